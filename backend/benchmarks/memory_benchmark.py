@@ -0,0 +1,96 @@
+"""大文件内存基准：并发执行生成与批量下载的实际代码路径，测量峰值RSS增量
+
+用法（在backend目录下）:
+    python benchmarks/memory_benchmark.py
+    python benchmarks/memory_benchmark.py --size-mb 32 --levels 1 4 16 32
+
+每个请求依次执行:
+    1. stream_to_file: /api/generate 写出音频的路径（上游音频由本地生成器模拟）
+    2. stream_zip / stream_concat: /api/batch-download 的输出路径，输出被逐块丢弃
+所有请求同时进行，不经过任何预算限流。每个并发数在独立子进程中运行，
+报告相对于开始前的峰值RSS增量；音频不在内存中累积时，增量应与并发数和文件大小基本无关。
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import resource
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tts.streaming import stream_to_file, open_files, stream_zip, stream_concat
+
+CHUNK = 64 * 1024
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def fake_audio(total_bytes: int):
+    """模拟Edge-TTS逐块返回的音频流"""
+    chunk = os.urandom(CHUNK)
+    sent = 0
+    while sent < total_bytes:
+        # 每块都是独立对象，模拟真实网络数据
+        yield bytes(memoryview(chunk))
+        sent += CHUNK
+        await asyncio.sleep(0)
+
+
+async def drain(parts) -> int:
+    size = 0
+    for part in parts:
+        size += len(part)
+        await asyncio.sleep(0)
+    return size
+
+
+async def request(workdir: str, index: int, total_bytes: int) -> int:
+    output_file = os.path.join(workdir, f"tts_{index}.mp3")
+    await stream_to_file(fake_audio(total_bytes), output_file)
+    size = await drain(stream_zip(list(zip(open_files([output_file]), ["a.mp3"]))))
+    size += await drain(stream_concat(open_files([output_file, output_file])))
+    os.remove(output_file)
+    return size
+
+
+async def run_level(concurrency: int, total_bytes: int) -> None:
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as workdir:
+        sizes = await asyncio.gather(*(request(workdir, i, total_bytes) for i in range(concurrency)))
+    print(json.dumps({
+        "concurrency": concurrency,
+        "rss_growth_mb": round(peak_rss_mb() - baseline, 1),
+        "bytes_out_mb": round(sum(sizes) / 1024 / 1024, 1)
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="流式I/O内存基准")
+    parser.add_argument("--size-mb", type=int, default=16, help="每个请求生成的音频大小（MB）")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 32], help="并发请求数")
+    parser.add_argument("--child", type=int, metavar="CONCURRENCY", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    total_bytes = args.size_mb * 1024 * 1024
+
+    if args.child:
+        asyncio.run(run_level(args.child, total_bytes))
+        return
+
+    print(f"每请求 {args.size_mb} MB")
+    print(f"{'并发':>6}{'输出(MB)':>12}{'RSS增量(MB)':>14}")
+    for level in args.levels:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--size-mb", str(args.size_mb), "--child", str(level)],
+            capture_output=True, text=True, check=True
+        )
+        row = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{row['concurrency']:>6}{row['bytes_out_mb']:>12}{row['rss_growth_mb']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import os
 from tts.routers import router as tts_router
 from user.routers import router as user_router
 from tts.repository import ensure_directories
+from tts.voice_catalog import voice_catalog
 from database import Base, engine
 from dotenv import load_dotenv
 import edge_tts
@@ -52,8 +53,14 @@ app.mount("/output", StaticFiles(directory=output_dir), name="output")
 @app.on_event("startup")
 async def startup_event():
     ensure_directories()
+    voice_catalog.start()
     print(f"[启动] Edge-TTS版本: {edge_tts.__version__}")
 
+# 应用关闭时执行
+@app.on_event("shutdown")
+async def shutdown_event():
+    await voice_catalog.stop()
+
 if __name__ == "__main__":
     # 从环境变量获取配置
     host = os.getenv("API_HOST", "0.0.0.0")
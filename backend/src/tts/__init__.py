@@ -1,19 +1,25 @@
-from .models import TTSRequest, VOICE_MAPPING
-from .services import generate_tts_audio_simple, cleanup_files
+from .models import TTSRequest, BatchDownloadRequest, VOICE_MAPPING
+from .services import generate_tts_audio_simple, stream_tts_audio, cleanup_files
 from .repository import (
     ensure_directories,
     generate_output_filename,
     get_file_path,
     check_file_exists,
     get_file_size,
-    create_file_response
+    create_file_response,
+    create_stream_response
 )
+from .streaming import ByteBudget, audio_buffer_budget, stream_to_file, open_files, close_files, stream_zip, stream_concat
+from .voice_catalog import VoiceCatalog, voice_catalog
+from .realtime import RealtimeSession, SentenceCache, split_sentences
 from .routers import router
 
 __all__ = [
     "TTSRequest",
+    "BatchDownloadRequest",
     "VOICE_MAPPING",
     "generate_tts_audio_simple",
+    "stream_tts_audio",
     "cleanup_files",
     "ensure_directories",
     "generate_output_filename",
@@ -21,5 +27,18 @@ __all__ = [
     "check_file_exists",
     "get_file_size",
     "create_file_response",
+    "create_stream_response",
+    "ByteBudget",
+    "audio_buffer_budget",
+    "stream_to_file",
+    "open_files",
+    "close_files",
+    "stream_zip",
+    "stream_concat",
+    "VoiceCatalog",
+    "voice_catalog",
+    "RealtimeSession",
+    "SentenceCache",
+    "split_sentences",
     "router"
 ]
\ No newline at end of file
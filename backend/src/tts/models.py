@@ -1,3 +1,4 @@
+from typing import List, Literal
 from pydantic import BaseModel
 
 class TTSRequest(BaseModel):
@@ -6,6 +7,10 @@ class TTSRequest(BaseModel):
     bgm: str = ""
     interval: int = 0
 
+class BatchDownloadRequest(BaseModel):
+    filenames: List[str]
+    format: Literal["zip", "concat"] = "zip"
+
 VOICE_MAPPING = {
     "zh-CN-YunyangNeural": "zh-CN-YunyangNeural",
     "zh-CN-XiaoxiaoNeural": "zh-CN-XiaoxiaoNeural",
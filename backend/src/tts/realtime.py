@@ -0,0 +1,224 @@
+import os
+import re
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from fastapi import WebSocket
+from dotenv import load_dotenv
+from .services import stream_tts_audio
+from .voice_catalog import voice_catalog
+from .streaming import audio_buffer_budget
+
+# 加载环境变量
+load_dotenv()
+
+# 句子级缓存上限（字节）
+SENTENCE_CACHE_MAX_BYTES = int(os.getenv("SENTENCE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# 单句合成时在内存中缓冲的上限（字节），超出的句子照常推送但不进入缓存
+SENTENCE_BUFFER_MAX_BYTES = int(os.getenv("SENTENCE_BUFFER_MAX_BYTES", str(1024 * 1024)))
+
+# 编辑防抖时间（毫秒），连续输入时只合成最后一次编辑
+REALTIME_DEBOUNCE_MS = int(os.getenv("REALTIME_DEBOUNCE_MS", "300"))
+
+MAX_TEXT_LENGTH = 500
+
+SENTENCE_PATTERN = re.compile(r"[^。！？!?；;\n]+[。！？!?；;]*")
+
+
+def split_sentences(text: str) -> List[str]:
+    """按句末标点和换行切分句子，忽略纯标点片段"""
+    sentences = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentence = match.group().strip()
+        if sentence and re.search(r"\w", sentence):
+            sentences.append(sentence)
+    return sentences
+
+
+def sentence_key(voice: str, sentence: str) -> str:
+    """句子的缓存键，同一语音下相同文本复用音频"""
+    return hashlib.sha1(f"{voice}\n{sentence}".encode("utf-8")).hexdigest()[:16]
+
+
+class SentenceCache:
+    """按字节数限制的句子音频LRU缓存"""
+
+    def __init__(self, max_bytes: int = SENTENCE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, List[Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, List[Dict[str, Any]]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, audio: bytes, boundaries: List[Dict[str, Any]]) -> None:
+        if len(audio) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[0])
+        self._entries[key] = (audio, boundaries)
+        self.size += len(audio)
+        while self.size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+sentence_cache = SentenceCache()
+
+
+class RealtimeSession:
+    """单个WebSocket客户端的实时合成会话
+
+    客户端按句子键保存已收到的音频，服务端只推送本会话尚未下发的句子；
+    新的编辑会取消正在进行的合成，未收到sentence_end的句子音频应由客户端丢弃。
+    """
+
+    def __init__(self, websocket: WebSocket, voice: str, cache: SentenceCache = sentence_cache):
+        self.websocket = websocket
+        self.voice = voice
+        self.cache = cache
+        self.text = ""
+        self.version = 0
+        self.delivered: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(message, ensure_ascii=False))
+
+    async def send_audio(self, version: int, key: str, data: bytes) -> None:
+        # 头帧和数据帧必须成对发出，屏蔽取消避免客户端把头帧配到下一个数据帧上
+        await asyncio.shield(self._send_audio_frames(version, key, data))
+
+    async def _send_audio_frames(self, version: int, key: str, data: bytes) -> None:
+        # 先发JSON头再发二进制帧，加锁保证两帧相邻
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps({"type": "audio", "version": version, "key": key, "size": len(data)}))
+            await self.websocket.send_bytes(data)
+
+    def handle(self, message: Dict[str, Any]) -> None:
+        """处理客户端消息，非法消息抛出ValueError"""
+        message_type = message.get("type")
+        if message_type == "edit":
+            self._apply_edit(message)
+        elif message_type == "config":
+            voice = message.get("voice", "")
+            actual_voice = voice_catalog.resolve(voice)
+            if actual_voice is None:
+                raise ValueError(f"不支持的声音类型: {voice}")
+            if actual_voice == self.voice:
+                return
+            self.voice = actual_voice
+        else:
+            raise ValueError(f"未知的消息类型: {message_type}")
+        self.version += 1
+        self._schedule()
+
+    def _apply_edit(self, message: Dict[str, Any]) -> None:
+        if "text" in message:
+            text = message["text"]
+            if not isinstance(text, str):
+                raise ValueError("text必须为字符串")
+        else:
+            start = message.get("start")
+            end = message.get("end", start)
+            insert = message.get("insert", "")
+            if not isinstance(start, int) or not isinstance(end, int) or not isinstance(insert, str):
+                raise ValueError("增量编辑需要整数start/end和字符串insert")
+            if not 0 <= start <= end <= len(self.text):
+                raise ValueError(f"编辑范围越界: [{start}, {end})，当前文本长度 {len(self.text)}")
+            text = self.text[:start] + insert + self.text[end:]
+        if len(text) > MAX_TEXT_LENGTH:
+            raise ValueError(f"文本长度不能超过{MAX_TEXT_LENGTH}个字符")
+        self.text = text
+
+    def _schedule(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            print(f"[日志] 实时合成: 新编辑取代旧任务，版本 {self.version}")
+        self._task = asyncio.create_task(self._synthesize(self.version, self.text, self.voice))
+
+    async def _synthesize(self, version: int, text: str, voice: str) -> None:
+        await asyncio.sleep(REALTIME_DEBOUNCE_MS / 1000)
+
+        order = []
+        sentences: Dict[str, str] = {}
+        for sentence in split_sentences(text):
+            key = sentence_key(voice, sentence)
+            order.append(key)
+            sentences.setdefault(key, sentence)
+        try:
+            # sentences按键去重，每个未下发的键恰好对应一条sentence_end；order为含重复句的播放顺序
+            await self.send_json({
+                "type": "plan",
+                "version": version,
+                "sentences": [
+                    {"key": key, "text": sentence, "delivered": key in self.delivered}
+                    for key, sentence in sentences.items()
+                ],
+                "order": order
+            })
+            for key, sentence in sentences.items():
+                if key in self.delivered:
+                    continue
+                cached = self.cache.get(key)
+                if cached is not None:
+                    audio, boundaries = cached
+                    await self.send_audio(version, key, audio)
+                    for boundary in boundaries:
+                        await self.send_json({"version": version, "key": key, **boundary})
+                else:
+                    await self._stream_sentence(version, key, sentence, voice)
+                # 客户端收到sentence_end后才算下发完成，发送前被取消则下次重发
+                await self.send_json({"type": "sentence_end", "version": version, "key": key, "cached": cached is not None})
+                self.delivered.add(key)
+            await self.send_json({"type": "done", "version": version})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error_msg = f"[错误] 实时合成失败: {str(e)}"
+            print(error_msg)
+            try:
+                await self.send_json({"type": "error", "version": version, "detail": error_msg})
+            except Exception:
+                pass
+
+    async def _stream_sentence(self, version: int, key: str, sentence: str, voice: str) -> None:
+        chunks: Optional[List[bytes]] = []
+        buffered = 0
+        boundaries: List[Dict[str, Any]] = []
+        # 开始前一次性申请缓冲上限，持有期间不再追加申请，避免会话之间互相等待
+        async with audio_buffer_budget.reserve(SENTENCE_BUFFER_MAX_BYTES) as granted:
+            async for event in stream_tts_audio(sentence, voice):
+                if event["type"] == "audio":
+                    data = event["data"]
+                    if chunks is not None:
+                        if buffered + len(data) <= granted:
+                            chunks.append(data)
+                            buffered += len(data)
+                        else:
+                            chunks = None
+                    await self.send_audio(version, key, data)
+                else:
+                    boundaries.append(event)
+                    await self.send_json({"version": version, "key": key, **event})
+            # 只缓存完整合成的句子，被取消的半句不会进入缓存
+            if chunks is not None:
+                self.cache.put(key, b"".join(chunks), boundaries)
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
@@ -1,8 +1,9 @@
 import os
 import uuid
 from datetime import datetime
-from typing import Dict, Any
-from fastapi.responses import FileResponse
+from typing import Dict, Any, Iterator, Optional
+from starlette.background import BackgroundTask
+from fastapi.responses import FileResponse, StreamingResponse
 
 def ensure_directories() -> None:
     """确保必要的目录存在"""
@@ -15,6 +16,11 @@ def generate_output_filename() -> str:
     unique_id = str(uuid.uuid4())[:8]
     return f"tts_{timestamp}_{unique_id}.mp3"
 
+def generate_batch_filename(extension: str) -> str:
+    """生成批量下载的文件名"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"tts_batch_{timestamp}.{extension}"
+
 def get_file_path(filename: str) -> str:
     """获取文件的完整路径"""
     return os.path.join("output", filename)
@@ -39,4 +45,15 @@ def create_file_response(filename: str) -> FileResponse:
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
         }
-    )
\ No newline at end of file
+    )
+
+def create_stream_response(content: Iterator[bytes], filename: str, media_type: str, background: Optional[BackgroundTask] = None) -> StreamingResponse:
+    """创建流式文件响应，内容边生成边发送"""
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        background=background,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
@@ -1,18 +1,37 @@
 import os
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+import json
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse
-from .models import TTSRequest
+from starlette.background import BackgroundTask
+from .models import TTSRequest, BatchDownloadRequest, VOICE_MAPPING
 from .services import generate_tts_audio_simple, cleanup_files
 from .repository import (
     generate_output_filename, 
     get_file_path, 
     check_file_exists, 
     get_file_size, 
-    create_file_response
+    create_file_response,
+    create_stream_response,
+    generate_batch_filename
 )
+from .streaming import open_files, close_files, stream_zip, stream_concat
+from .voice_catalog import voice_catalog
+from .realtime import RealtimeSession
 
 router = APIRouter(prefix="", tags=["TTS"])
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """按弱比较判断If-None-Match是否命中，支持W/前缀、多个标签和*"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag and tag == etag:
+            return True
+    return False
+
 @router.post("/generate")
 async def generate_audio(request: TTSRequest, background_tasks: BackgroundTasks):
     """音频生成API"""
@@ -34,6 +53,11 @@ async def generate_audio(request: TTSRequest, background_tasks: BackgroundTasks)
         print(error_msg)
         raise HTTPException(status_code=400, detail=error_msg)
     
+    if not voice_catalog.is_valid(request.voice):
+        error_msg = f"[错误] 不支持的声音类型: {request.voice}"
+        print(error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
     print(f"[日志] 请求参数 - 文本长度: {len(request.text)}, 声音: {request.voice}, BGM: {request.bgm}, 间隔: {interval}秒")
     
     output_filename = generate_output_filename()
@@ -75,6 +99,87 @@ async def generate_audio(request: TTSRequest, background_tasks: BackgroundTasks)
         print(f"[错误] 异常堆栈: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"音频生成失败: {str(e)}")
 
+@router.get("/voices")
+async def list_voices(request: Request, response: Response, locale: str = "", gender: str = "", style: str = ""):
+    """获取可用语音列表，支持按语言、性别、风格筛选"""
+    voice_catalog.ensure_loaded()
+    headers = {"ETag": voice_catalog.etag, "Cache-Control": "public, max-age=300"}
+    if etag_matches(request.headers.get("if-none-match", ""), voice_catalog.etag):
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    voices = voice_catalog.search(locale=locale, gender=gender, style=style)
+    return {
+        "voices": voices,
+        "aliases": {alias: actual for alias, actual in VOICE_MAPPING.items() if actual in voice_catalog.voices},
+        "total": len(voices),
+        "source": voice_catalog.source
+    }
+
+@router.websocket("/ws/synthesize")
+async def realtime_synthesize(websocket: WebSocket, voice: str = "zh-CN-YunxiNeural"):
+    """实时合成：接收文本编辑，只重新合成变化的句子并推送音频块和单词边界"""
+    await websocket.accept()
+    actual_voice = voice_catalog.resolve(voice)
+    if actual_voice is None:
+        await websocket.send_text(json.dumps({"type": "error", "detail": f"不支持的声音类型: {voice}"}, ensure_ascii=False))
+        await websocket.close(code=1008)
+        return
+    
+    print(f"[日志] 实时合成会话建立，声音: {actual_voice}")
+    session = RealtimeSession(websocket, actual_voice)
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                if frame.get("text") is None:
+                    raise ValueError("只接受JSON文本消息")
+                message = json.loads(frame["text"])
+                if not isinstance(message, dict):
+                    raise ValueError("消息必须为JSON对象")
+                session.handle(message)
+            except ValueError as e:
+                await session.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        print("[日志] 实时合成会话断开")
+    finally:
+        await session.close()
+
+@router.post("/batch-download")
+async def batch_download(request: BatchDownloadRequest):
+    """批量下载已生成的音频，zip打包或按顺序拼接，均为流式输出"""
+    if not request.filenames:
+        raise HTTPException(status_code=400, detail="[错误] 文件列表不能为空")
+    
+    if len(request.filenames) > 50:
+        raise HTTPException(status_code=400, detail="[错误] 单次最多下载50个文件")
+    
+    if len(set(request.filenames)) != len(request.filenames):
+        raise HTTPException(status_code=400, detail="[错误] 文件列表中有重复文件")
+    
+    file_paths = []
+    for filename in request.filenames:
+        file_path = get_file_path(filename)
+        if filename in ("", ".", "..") or os.path.basename(filename) != filename or not os.path.isfile(file_path):
+            raise HTTPException(status_code=404, detail=f"文件不存在: {filename}")
+        file_paths.append(file_path)
+    
+    try:
+        files = open_files(file_paths)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"文件不存在: {os.path.basename(e.filename or '')}")
+    
+    print(f"[日志] 批量下载 {len(files)} 个文件，格式: {request.format}")
+    
+    # 客户端在流开始前断开时生成器不会执行，由后台任务兜底关闭句柄
+    background = BackgroundTask(close_files, files)
+    if request.format == "zip":
+        entries = list(zip(files, request.filenames))
+        return create_stream_response(stream_zip(entries), generate_batch_filename("zip"), "application/zip", background)
+    return create_stream_response(stream_concat(files), generate_batch_filename("mp3"), "audio/mpeg", background)
+
 @router.get("/output/{filename}")
 async def get_output_file(filename: str):
     """获取生成的音频文件"""
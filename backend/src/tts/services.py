@@ -2,7 +2,15 @@ import os
 import asyncio
 import time
 import edge_tts
-from typing import List
+from typing import List, AsyncIterator, Dict, Any
+from .voice_catalog import voice_catalog
+from .streaming import stream_to_file
+
+async def _audio_chunks(communicate: edge_tts.Communicate) -> AsyncIterator[bytes]:
+    """只取Edge-TTS流中的音频数据"""
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            yield chunk["data"]
 
 async def generate_tts_audio_simple(text: str, voice: str, output_file: str) -> None:
     """Edge-TTS实现"""
@@ -18,12 +26,13 @@ async def generate_tts_audio_simple(text: str, voice: str, output_file: str) ->
     print(f"[日志] 开始生成TTS，文本长度: {len(text)}，声音类型: {voice}")
     
     # 获取实际使用的语音
-    from .models import VOICE_MAPPING
-    if voice in VOICE_MAPPING:
-        actual_voice = VOICE_MAPPING[voice]
+    actual_voice = voice_catalog.resolve(voice)
+    if actual_voice is None:
+        print(f"[错误] 未知的声音类型: {voice}")
+        raise ValueError(f"不支持的声音类型: {voice}")
+    if actual_voice != voice:
         print(f"[日志] 使用自定义映射: {voice} -> {actual_voice}")
     else:
-        actual_voice = voice
         print(f"[日志] 直接使用Edge-TTS语音ID: {actual_voice}")
     
     try:
@@ -38,7 +47,7 @@ async def generate_tts_audio_simple(text: str, voice: str, output_file: str) ->
             pitch='+0Hz',
         )
         
-        await asyncio.wait_for(communicate.save(output_file), timeout=60)
+        await asyncio.wait_for(stream_to_file(_audio_chunks(communicate), output_file), timeout=60)
         print(f"[日志] Edge-TTS执行完成")
         
         if not os.path.exists(output_file):
@@ -58,6 +67,29 @@ async def generate_tts_audio_simple(text: str, voice: str, output_file: str) ->
         print(error_msg)
         raise
 
+async def stream_tts_audio(text: str, actual_voice: str) -> AsyncIterator[Dict[str, Any]]:
+    """Edge-TTS流式合成，逐个产出音频块和单词边界事件"""
+    communicate = edge_tts.Communicate(
+        text,
+        actual_voice,
+        rate='+0%',
+        volume='+0%',
+        pitch='+0Hz',
+        boundary="WordBoundary",
+    )
+    
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            yield {"type": "audio", "data": chunk["data"]}
+        elif chunk["type"] == "WordBoundary":
+            # Edge-TTS的时间单位为100纳秒，转换为毫秒
+            yield {
+                "type": "boundary",
+                "offset": chunk["offset"] // 10000,
+                "duration": chunk["duration"] // 10000,
+                "text": chunk["text"],
+            }
+
 def cleanup_files(file_paths: List[str], delay_hours: int = 0) -> None:
     """清理临时文件，支持延迟清理"""
     if delay_hours > 0:
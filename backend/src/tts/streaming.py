@@ -0,0 +1,150 @@
+import os
+import io
+import asyncio
+import zipfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Iterator, List, Tuple
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 全局在途音频内存缓冲预算（字节），仅约束需在内存中累积音频的场景（实时合成的句子缓冲），超出时等待
+AUDIO_BUFFER_BUDGET = int(os.getenv("AUDIO_BUFFER_BUDGET", str(64 * 1024 * 1024)))
+
+# 流式读写的块大小
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(64 * 1024)))
+
+
+class ByteBudget:
+    """全局字节预算，预算用尽时申请方等待（背压）"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.in_use = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> int:
+        """申请字节预算，返回实际占用的字节数；单次申请不超过总预算"""
+        size = min(size, self.total)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_use + size <= self.total)
+            self.in_use += size
+        return size
+
+    async def release(self, size: int) -> None:
+        """归还字节预算并唤醒等待方"""
+        async with self._condition:
+            self.in_use -= size
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def reserve(self, size: int) -> AsyncIterator[int]:
+        granted = await self.acquire(size)
+        try:
+            yield granted
+        finally:
+            await self.release(granted)
+
+
+audio_buffer_budget = ByteBudget(AUDIO_BUFFER_BUDGET)
+
+
+async def stream_to_file(chunks: AsyncIterator[bytes], output_file: str) -> int:
+    """将异步音频块边收边写入同目录的.part文件，完成后原子替换为目标文件，返回写入字节数
+
+    音频不在内存中累积；任何阶段失败都会删除.part文件，输出目录不会出现残缺文件。
+    """
+    part_file = output_file + ".part"
+    size = 0
+    try:
+        with open(part_file, "wb") as f:
+            async for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(part_file, output_file)
+    except BaseException:
+        if os.path.exists(part_file):
+            os.remove(part_file)
+        raise
+    return size
+
+
+def open_files(file_paths: List[str]) -> List[BinaryIO]:
+    """在开始响应前打开所有文件，任一文件缺失则关闭已打开的文件并抛出FileNotFoundError
+
+    已打开的句柄不受之后的定时清理影响，避免响应发送到一半才发现文件被删除；
+    调用方需保证在响应结束后调用close_files，即使流从未开始。
+    """
+    files: List[BinaryIO] = []
+    try:
+        for file_path in file_paths:
+            files.append(open(file_path, "rb"))
+    except OSError:
+        for f in files:
+            f.close()
+        raise
+    return files
+
+
+def close_files(files: List[BinaryIO]) -> None:
+    """关闭文件句柄，可重复调用"""
+    for f in files:
+        f.close()
+
+
+def iter_file(f: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """按块读取已打开的文件"""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def stream_concat(files: List[BinaryIO], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """按顺序流式拼接多个MP3文件，结束后关闭文件"""
+    try:
+        for f in files:
+            yield from iter_file(f, chunk_size)
+    finally:
+        close_files(files)
+
+
+class _ChunkSink(io.RawIOBase):
+    """不可寻址的写入端，暂存zipfile写出的字节供生成器取走"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def stream_zip(entries: List[Tuple[BinaryIO, str]], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """流式生成zip包，entries为(已打开的文件, 包内名称)列表，结束后关闭文件
+
+    MP3已是压缩格式，使用ZIP_STORED避免无效的CPU开销；输出端不可寻址时
+    zipfile会使用数据描述符，因此无需先在内存或磁盘中拼出整个压缩包。
+    """
+    sink = _ChunkSink()
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for f, arcname in entries:
+                force_zip64 = os.fstat(f.fileno()).st_size >= zipfile.ZIP64_LIMIT
+                with archive.open(arcname, mode="w", force_zip64=force_zip64) as dest:
+                    for chunk in iter_file(f, chunk_size):
+                        dest.write(chunk)
+                        yield from sink.drain()
+                yield from sink.drain()
+        yield from sink.drain()
+    finally:
+        close_files([f for f, _ in entries])
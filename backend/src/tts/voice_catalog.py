@@ -0,0 +1,155 @@
+import os
+import json
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Set, Any
+import edge_tts
+from dotenv import load_dotenv
+from .models import VOICE_MAPPING
+
+# 加载环境变量
+load_dotenv()
+
+# 离线语音列表快照（edge_tts.list_voices 的返回格式，用 python -m tts.voice_catalog 更新）
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "voices_snapshot.json")
+
+# 后台刷新间隔（秒）
+VOICE_REFRESH_INTERVAL = int(os.getenv("VOICE_REFRESH_INTERVAL", "21600"))
+
+
+class VoiceCatalog:
+    """语音目录：按语言、性别、风格索引上游语音列表"""
+
+    def __init__(self):
+        self.voices: Dict[str, Dict[str, Any]] = {}
+        self.by_locale: Dict[str, Set[str]] = {}
+        self.by_gender: Dict[str, Set[str]] = {}
+        self.by_style: Dict[str, Set[str]] = {}
+        self.etag = ""
+        self.source = ""
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def load(self, voices: List[Dict[str, Any]], source: str) -> None:
+        """用语音列表重建索引，整体替换以保证读取方看到一致的快照"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        by_locale: Dict[str, Set[str]] = {}
+        by_gender: Dict[str, Set[str]] = {}
+        by_style: Dict[str, Set[str]] = {}
+
+        for voice in voices:
+            short_name = voice.get("ShortName")
+            if not short_name:
+                continue
+            tags = voice.get("VoiceTag") or {}
+            styles = sorted(set((tags.get("ContentCategories") or []) + (tags.get("VoicePersonalities") or [])))
+            entry = {
+                "name": short_name,
+                "friendly_name": voice.get("FriendlyName", ""),
+                "locale": voice.get("Locale", ""),
+                "gender": voice.get("Gender", ""),
+                "styles": styles,
+            }
+            entries[short_name] = entry
+            by_locale.setdefault(entry["locale"].lower(), set()).add(short_name)
+            by_gender.setdefault(entry["gender"].lower(), set()).add(short_name)
+            for style in styles:
+                by_style.setdefault(style.lower(), set()).add(short_name)
+
+        payload = json.dumps([entries[name] for name in sorted(entries)], ensure_ascii=False)
+        self.voices = entries
+        self.by_locale = by_locale
+        self.by_gender = by_gender
+        self.by_style = by_style
+        self.etag = '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest() + '"'
+        self.source = source
+        print(f"[日志] 语音目录已加载: {len(entries)} 个语音，来源: {source}")
+
+    def load_snapshot(self) -> None:
+        """加载随代码发布的离线快照"""
+        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+            self.load(json.load(f), source="snapshot")
+
+    def ensure_loaded(self) -> None:
+        """目录为空时先加载快照，保证校验不依赖网络"""
+        if not self.voices:
+            self.load_snapshot()
+
+    async def refresh(self) -> bool:
+        """从Edge-TTS拉取最新语音列表，失败时保留当前索引"""
+        try:
+            voices = await asyncio.wait_for(edge_tts.list_voices(), timeout=30)
+            if not voices:
+                print("[警告] 上游语音列表为空，保持当前目录")
+                return False
+            self.load(voices, source="upstream")
+        except Exception as e:
+            print(f"[警告] 刷新上游语音列表失败，继续使用{self.source or '空'}目录: {str(e)}")
+            return False
+        return True
+
+    async def _refresh_loop(self, interval: int) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[警告] 语音目录刷新异常: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: int = VOICE_REFRESH_INTERVAL) -> None:
+        """加载快照并启动后台定期刷新"""
+        self.ensure_loaded()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval))
+
+    async def stop(self) -> None:
+        """停止后台刷新任务"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def resolve(self, voice: str) -> Optional[str]:
+        """将请求中的声音（自定义别名或Edge-TTS语音ID）解析为实际语音ID，未知返回None"""
+        self.ensure_loaded()
+        actual_voice = VOICE_MAPPING.get(voice, voice)
+        if actual_voice in self.voices:
+            return actual_voice
+        return None
+
+    def is_valid(self, voice: str) -> bool:
+        """检查声音是否可用"""
+        return self.resolve(voice) is not None
+
+    def search(self, locale: str = "", gender: str = "", style: str = "") -> List[Dict[str, Any]]:
+        """按语言、性别、风格筛选语音"""
+        self.ensure_loaded()
+        names: Optional[Set[str]] = None
+        for index, key in ((self.by_locale, locale), (self.by_gender, gender), (self.by_style, style)):
+            if not key:
+                continue
+            matched = index.get(key.lower(), set())
+            names = matched if names is None else names & matched
+        if names is None:
+            names = set(self.voices)
+        return [self.voices[name] for name in sorted(names)]
+
+
+voice_catalog = VoiceCatalog()
+
+
+async def dump_snapshot(path: str = SNAPSHOT_PATH) -> int:
+    """从Edge-TTS拉取完整语音列表写入快照文件，返回语音数量"""
+    voices = await edge_tts.list_voices()
+    voices.sort(key=lambda voice: voice["ShortName"])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(voices, f, ensure_ascii=False, indent=2)
+    return len(voices)
+
+
+if __name__ == "__main__":
+    # 在src目录下执行 python -m tts.voice_catalog 更新离线快照
+    count = asyncio.run(dump_snapshot())
+    print(f"[日志] 已写入 {count} 个语音到 {SNAPSHOT_PATH}")
@@ -0,0 +1,221 @@
+import json
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import tts.realtime as realtime
+from tts.realtime import RealtimeSession, SentenceCache, split_sentences
+from tts.streaming import ByteBudget
+from tts.routers import router
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(monkeypatch, tmp_path):
+    # 会话会在工作目录下创建temp/，避免污染仓库
+    monkeypatch.chdir(tmp_path)
+
+
+class FakeWebSocket:
+    """记录发出的帧；gate命中时在发送该帧前挂起，用于在指定位置触发取消"""
+
+    def __init__(self):
+        self.frames = []
+        self.gate = None
+        self.gate_reached = asyncio.Event()
+        self.gate_open = asyncio.Event()
+
+    async def _hold(self, frame) -> None:
+        if self.gate is not None and self.gate(frame):
+            self.gate = None
+            self.gate_reached.set()
+            await self.gate_open.wait()
+        self.frames.append(frame)
+
+    async def send_text(self, text: str) -> None:
+        await self._hold(json.loads(text))
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._hold(data)
+
+    def messages(self, message_type: str):
+        return [f for f in self.frames if isinstance(f, dict) and f.get("type") == message_type]
+
+
+def fake_upstream(calls):
+    async def stream_tts_audio(text, voice):
+        calls.append(text)
+        await asyncio.sleep(0)
+        yield {"type": "audio", "data": text.encode("utf-8")}
+        yield {"type": "boundary", "offset": 0, "duration": 100, "text": text}
+    return stream_tts_audio
+
+
+def setup(monkeypatch):
+    calls = []
+    monkeypatch.setattr(realtime, "stream_tts_audio", fake_upstream(calls))
+    monkeypatch.setattr(realtime, "REALTIME_DEBOUNCE_MS", 0)
+    return calls
+
+
+async def wait_done(websocket: FakeWebSocket, version: int) -> None:
+    while not any(m.get("version") == version for m in websocket.messages("done")):
+        await asyncio.sleep(0)
+
+
+def test_split_sentences():
+    assert split_sentences("全场五元！快来买。\n！！") == ["全场五元！", "快来买。"]
+
+
+def test_sentence_cache_evicts_least_recently_used():
+    cache = SentenceCache(max_bytes=10)
+    cache.put("a", b"1234", [])
+    cache.put("b", b"1234", [])
+    cache.get("a")
+    cache.put("c", b"1234", [])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.size == 8
+    cache.put("huge", b"x" * 11, [])
+    assert cache.get("huge") is None
+
+
+def test_only_changed_sentences_are_synthesized(monkeypatch):
+    calls = setup(monkeypatch)
+
+    async def run():
+        websocket = FakeWebSocket()
+        session = RealtimeSession(websocket, "zh-CN-YunxiNeural", cache=SentenceCache())
+        session.handle({"type": "edit", "text": "全场五元！快来买。"})
+        await wait_done(websocket, 1)
+        session.handle({"type": "edit", "start": 0, "end": 2, "insert": "今天"})
+        await wait_done(websocket, 2)
+        await session.close()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert calls == ["全场五元！", "快来买。", "今天五元！"]
+    plan = websocket.messages("plan")[-1]
+    assert [s["delivered"] for s in plan["sentences"]] == [False, True]
+
+
+def test_repeated_sentences_listed_once(monkeypatch):
+    calls = setup(monkeypatch)
+
+    async def run():
+        websocket = FakeWebSocket()
+        session = RealtimeSession(websocket, "zh-CN-YunxiNeural", cache=SentenceCache())
+        session.handle({"type": "edit", "text": "买！买！买！"})
+        await wait_done(websocket, 1)
+        await session.close()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert calls == ["买！"]
+    plan = websocket.messages("plan")[0]
+    assert len(plan["sentences"]) == 1
+    assert plan["order"] == [plan["sentences"][0]["key"]] * 3
+    pending = {s["key"] for s in plan["sentences"] if not s["delivered"]}
+    assert {m["key"] for m in websocket.messages("sentence_end")} == pending
+    assert len(websocket.messages("sentence_end")) == len(pending)
+
+
+def test_cancel_before_sentence_end_resends_sentence(monkeypatch):
+    setup(monkeypatch)
+
+    async def run():
+        websocket = FakeWebSocket()
+        websocket.gate = lambda f: isinstance(f, dict) and f.get("type") == "sentence_end"
+        session = RealtimeSession(websocket, "zh-CN-YunxiNeural", cache=SentenceCache())
+        session.handle({"type": "edit", "text": "全场五元！"})
+        await websocket.gate_reached.wait()
+        session.handle({"type": "edit", "text": "全场五元！快来买。"})
+        websocket.gate_open.set()
+        await wait_done(websocket, 2)
+        await session.close()
+        return websocket
+
+    websocket = asyncio.run(run())
+    plan = websocket.messages("plan")[-1]
+    assert plan["sentences"][0]["delivered"] is False
+    ends = [(m["version"], m["cached"]) for m in websocket.messages("sentence_end")]
+    assert ends[0] == (2, True)
+
+
+def test_audio_header_and_frame_stay_paired_on_cancel(monkeypatch):
+    setup(monkeypatch)
+
+    async def run():
+        websocket = FakeWebSocket()
+        websocket.gate = lambda f: isinstance(f, bytes)
+        session = RealtimeSession(websocket, "zh-CN-YunxiNeural", cache=SentenceCache())
+        session.handle({"type": "edit", "text": "全场五元！"})
+        await websocket.gate_reached.wait()
+        session.handle({"type": "edit", "text": "快来买。"})
+        websocket.gate_open.set()
+        await wait_done(websocket, 2)
+        await session.close()
+        return websocket
+
+    websocket = asyncio.run(run())
+    for index, frame in enumerate(websocket.frames):
+        if isinstance(frame, dict) and frame.get("type") == "audio":
+            assert isinstance(websocket.frames[index + 1], bytes)
+            assert len(websocket.frames[index + 1]) == frame["size"]
+
+
+def test_binary_frame_gets_error_reply(monkeypatch):
+    setup(monkeypatch)
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    with TestClient(app).websocket_connect("/api/ws/synthesize") as websocket:
+        websocket.send_bytes(b"\x00\x01")
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json({"type": "edit", "text": "全场五元！"})
+        assert websocket.receive_json()["type"] == "plan"
+
+
+def test_sessions_share_budget_without_deadlock(monkeypatch):
+    monkeypatch.setattr(realtime, "REALTIME_DEBOUNCE_MS", 0)
+    monkeypatch.setattr(realtime, "audio_buffer_budget", ByteBudget(100))
+    monkeypatch.setattr(realtime, "SENTENCE_BUFFER_MAX_BYTES", 80)
+
+    async def stream_tts_audio(text, voice):
+        for _ in range(8):
+            await asyncio.sleep(0)
+            yield {"type": "audio", "data": b"x" * 10}
+
+    monkeypatch.setattr(realtime, "stream_tts_audio", stream_tts_audio)
+
+    async def run():
+        sessions = [RealtimeSession(FakeWebSocket(), "zh-CN-YunxiNeural", cache=SentenceCache()) for _ in range(2)]
+        for index, session in enumerate(sessions):
+            session.handle({"type": "edit", "text": f"第{index}句。"})
+        await asyncio.wait_for(asyncio.gather(*(wait_done(s.websocket, 1) for s in sessions)), timeout=5)
+        for session in sessions:
+            await session.close()
+        return sessions
+
+    sessions = asyncio.run(run())
+    assert realtime.audio_buffer_budget.in_use == 0
+    for session in sessions:
+        audio = [f for f in session.websocket.frames if isinstance(f, bytes)]
+        assert b"".join(audio) == b"x" * 80
+
+
+def test_oversized_sentence_is_sent_but_not_cached(monkeypatch):
+    setup(monkeypatch)
+    monkeypatch.setattr(realtime, "SENTENCE_BUFFER_MAX_BYTES", 4)
+    cache = SentenceCache()
+
+    async def run():
+        websocket = FakeWebSocket()
+        session = RealtimeSession(websocket, "zh-CN-YunxiNeural", cache=cache)
+        session.handle({"type": "edit", "text": "全场五元！"})
+        await wait_done(websocket, 1)
+        await session.close()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert b"".join(f for f in websocket.frames if isinstance(f, bytes)) == "全场五元！".encode("utf-8")
+    assert cache.size == 0
+    assert realtime.audio_buffer_budget.in_use == 0
@@ -0,0 +1,122 @@
+import io
+import os
+import asyncio
+import zipfile
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from tts.streaming import ByteBudget, open_files, stream_to_file, stream_concat, stream_zip
+from tts.models import BatchDownloadRequest
+from tts.routers import router, batch_download
+
+
+def write_file(path, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_budget_blocks_until_released():
+    async def run():
+        budget = ByteBudget(100)
+        assert await budget.acquire(60) == 60
+        waiter = asyncio.create_task(budget.acquire(60))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await budget.release(60)
+        assert await asyncio.wait_for(waiter, timeout=1) == 60
+        # 超过总预算的申请按总预算计
+        await budget.release(60)
+        assert await budget.acquire(500) == 100
+        return budget
+
+    budget = asyncio.run(run())
+    assert budget.in_use == 100
+
+
+def test_stream_to_file_replaces_atomically(tmp_path):
+    async def chunks():
+        for _ in range(10):
+            yield b"a" * 100
+
+    output_file = str(tmp_path / "out.mp3")
+    assert asyncio.run(stream_to_file(chunks(), output_file)) == 1000
+    assert os.path.getsize(output_file) == 1000
+    assert os.listdir(tmp_path) == ["out.mp3"]
+
+
+def test_stream_to_file_failure_leaves_nothing(tmp_path):
+    async def chunks():
+        yield b"a" * 100
+        raise RuntimeError("upstream closed")
+
+    output_file = str(tmp_path / "out.mp3")
+    with pytest.raises(RuntimeError):
+        asyncio.run(stream_to_file(chunks(), output_file))
+    assert os.listdir(tmp_path) == []
+
+
+def test_stream_zip_and_concat(tmp_path):
+    first = write_file(tmp_path / "a.mp3", b"a" * 1000)
+    second = write_file(tmp_path / "b.mp3", b"b" * 500)
+
+    files = open_files([first, second])
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(list(zip(files, ["a.mp3", "b.mp3"])), chunk_size=128))))
+    assert archive.testzip() is None
+    assert archive.read("a.mp3") == b"a" * 1000
+    assert archive.read("b.mp3") == b"b" * 500
+    assert all(f.closed for f in files)
+
+    files = open_files([first, second])
+    assert b"".join(stream_concat(files, chunk_size=128)) == b"a" * 1000 + b"b" * 500
+    assert all(f.closed for f in files)
+
+
+def test_open_files_missing(tmp_path):
+    first = write_file(tmp_path / "a.mp3", b"a")
+    with pytest.raises(FileNotFoundError):
+        open_files([first, str(tmp_path / "missing.mp3")])
+
+
+def test_batch_download_validation(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output")
+    write_file(tmp_path / "output" / "a.mp3", b"a" * 10)
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    client = TestClient(app)
+
+    for filename in ["", ".", "..", "../a.mp3", "missing.mp3"]:
+        assert client.post("/api/batch-download", json={"filenames": [filename]}).status_code == 404
+    assert client.post("/api/batch-download", json={"filenames": ["a.mp3"], "format": "tar"}).status_code == 422
+
+    assert client.post("/api/batch-download", json={"filenames": ["a.mp3", "a.mp3"]}).status_code == 400
+
+    write_file(tmp_path / "output" / "b.mp3", b"b" * 10)
+    response = client.post("/api/batch-download", json={"filenames": ["a.mp3", "b.mp3"], "format": "concat"})
+    assert response.status_code == 200
+    assert response.content == b"a" * 10 + b"b" * 10
+    response = client.post("/api/batch-download", json={"filenames": ["a.mp3", "b.mp3"]})
+    assert zipfile.ZipFile(io.BytesIO(response.content)).namelist() == ["a.mp3", "b.mp3"]
+
+
+def test_batch_download_closes_files_if_stream_never_starts(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output")
+    write_file(tmp_path / "output" / "a.mp3", b"a" * 10)
+    opened = []
+    real_open_files = open_files
+
+    def tracking_open_files(file_paths):
+        files = real_open_files(file_paths)
+        opened.extend(files)
+        return files
+
+    monkeypatch.setattr("tts.routers.open_files", tracking_open_files)
+
+    async def run():
+        response = await batch_download(BatchDownloadRequest(filenames=["a.mp3"]))
+        await response.background()
+
+    asyncio.run(run())
+    assert opened and all(f.closed for f in opened)
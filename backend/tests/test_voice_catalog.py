@@ -0,0 +1,101 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import edge_tts
+from tts.voice_catalog import VoiceCatalog, voice_catalog
+from tts.routers import router, etag_matches
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    return TestClient(app)
+
+
+def upstream_voice(short_name: str, locale: str, gender: str) -> dict:
+    return {
+        "ShortName": short_name,
+        "Locale": locale,
+        "Gender": gender,
+        "FriendlyName": short_name,
+        "VoiceTag": {"ContentCategories": ["General"], "VoicePersonalities": ["Friendly"]},
+    }
+
+
+def test_resolve_alias_and_index():
+    catalog = VoiceCatalog()
+    catalog.load_snapshot()
+    assert catalog.resolve("zh-CN-Cantonese") == "zh-HK-HiuMaanNeural"
+    names = [voice["name"] for voice in catalog.search(locale="zh-cn", gender="male")]
+    assert "zh-CN-YunxiNeural" in names
+    assert all(voice["gender"] == "Male" for voice in catalog.search(gender="male"))
+
+
+def test_snapshot_rejects_unknown_ids():
+    catalog = VoiceCatalog()
+    catalog.load_snapshot()
+    assert catalog.resolve("en-US-EmmaMultilingualNeural") == "en-US-EmmaMultilingualNeural"
+    assert catalog.resolve("zh-CN-TotallyMadeUpNeural") is None
+    assert catalog.resolve("zh-CN-Shandong") is None
+    assert catalog.resolve("") is None
+
+
+def test_refresh_keeps_catalog_on_malformed_upstream(monkeypatch):
+    catalog = VoiceCatalog()
+    catalog.load_snapshot()
+    etag = catalog.etag
+
+    async def list_voices():
+        return [{"ShortName": "zh-CN-XiaoxiaoNeural", "VoiceTag": {"ContentCategories": None}}, None]
+
+    monkeypatch.setattr(edge_tts, "list_voices", list_voices)
+    assert asyncio.run(catalog.refresh()) is False
+    assert catalog.source == "snapshot"
+    assert catalog.etag == etag
+
+
+def test_load_tolerates_null_tags():
+    catalog = VoiceCatalog()
+    voice = upstream_voice("zh-CN-XiaoxiaoNeural", "zh-CN", "Female")
+    voice["VoiceTag"] = {"ContentCategories": None, "VoicePersonalities": ["Warm"]}
+    catalog.load([voice], source="upstream")
+    assert catalog.voices["zh-CN-XiaoxiaoNeural"]["styles"] == ["Warm"]
+
+
+def test_upstream_list_is_strict():
+    catalog = VoiceCatalog()
+    catalog.load([upstream_voice("zh-CN-XiaoxiaoNeural", "zh-CN", "Female")], source="upstream")
+    assert catalog.resolve("zh-CN-XiaoxiaoNeural") == "zh-CN-XiaoxiaoNeural"
+    assert catalog.resolve("en-US-EmmaMultilingualNeural") is None
+
+
+def test_etag_changes_with_voice_list():
+    catalog = VoiceCatalog()
+    catalog.load([upstream_voice("zh-CN-XiaoxiaoNeural", "zh-CN", "Female")], source="upstream")
+    first = catalog.etag
+    catalog.load([upstream_voice("zh-CN-YunxiNeural", "zh-CN", "Male")], source="upstream")
+    assert catalog.etag != first
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"x"', '"abc"')
+    assert not etag_matches("", '"abc"')
+
+
+def test_voices_endpoint_not_modified():
+    client = make_client()
+    response = client.get("/api/voices")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag == voice_catalog.etag
+    assert client.get("/api/voices", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_generate_rejects_unknown_voice():
+    client = make_client()
+    response = client.post("/api/generate", json={"text": "全场五元", "voice": "not-a-voice"})
+    assert response.status_code == 400